@@ -4,16 +4,18 @@ Authentication module for Google Docs API.
 Handles OAuth 2.0 and Service Account authentication.
 """
 
+from __future__ import annotations
+
 import os
 import json
 from pathlib import Path
-from typing import Optional, Union
+from typing import TYPE_CHECKING, Optional, Union
 
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google.oauth2.service_account import Credentials as ServiceAccountCredentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
+# Google auth libraries are imported inside the functions that use them, so
+# commands like logout don't pay their import cost
+if TYPE_CHECKING:
+    from google.oauth2.credentials import Credentials
+    from google.oauth2.service_account import Credentials as ServiceAccountCredentials
 
 # Scopes required for reading and writing Google Docs
 SCOPES = ["https://www.googleapis.com/auth/documents"]
@@ -21,6 +23,12 @@ SCOPES = ["https://www.googleapis.com/auth/documents"]
 # Default path for storing user credentials
 DEFAULT_CREDS_PATH = Path.home() / ".gdoc-credentials.json"
 
+# Shared HTTP connection object (created on first use, see _get_shared_http)
+_shared_http = None
+
+# Docs service built from the default credentials (created on first use, see get_docs_service)
+_default_service = None
+
 
 class AuthenticationError(Exception):
     """Raised when authentication fails."""
@@ -50,6 +58,8 @@ def get_service_account_credentials(
             "Set GOOGLE_SERVICE_ACCOUNT_KEY_FILE environment variable."
         )
 
+    from google.oauth2.service_account import Credentials as ServiceAccountCredentials
+
     key_path = Path(key_file).expanduser()
 
     if not key_path.exists():
@@ -83,17 +93,21 @@ def get_credentials(
     Raises:
         AuthenticationError: If authentication fails or credentials are missing
     """
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     if creds_path is None:
         creds_path = DEFAULT_CREDS_PATH
 
     creds = None
 
-    # Try to load existing credentials
-    if creds_path.exists():
-        try:
-            creds = Credentials.from_authorized_user_file(str(creds_path), SCOPES)
-        except Exception as e:
-            print(f"Warning: Could not load credentials from {creds_path}: {e}")
+    # Try to load existing credentials (a missing file just means no saved login yet)
+    try:
+        creds = Credentials.from_authorized_user_file(str(creds_path), SCOPES)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Warning: Could not load credentials from {creds_path}: {e}")
 
     # Refresh or create new credentials
     if creds and creds.expired and creds.refresh_token:
@@ -129,6 +143,8 @@ def get_credentials(
 
         # Run OAuth flow
         try:
+            from google_auth_oauthlib.flow import InstalledAppFlow
+
             flow = InstalledAppFlow.from_client_config(client_config, SCOPES)
             creds = flow.run_local_server(port=0)
         except Exception as e:
@@ -146,6 +162,22 @@ def get_credentials(
     return creds
 
 
+def _get_shared_http():
+    """
+    Get the process-wide httplib2 connection object.
+
+    httplib2 keeps connections alive per host, so sharing one instance lets
+    back-to-back requests (e.g. a revision lookup followed by batchUpdate)
+    reuse a single TCP/TLS connection. It is not thread-safe.
+    """
+    global _shared_http
+    if _shared_http is None:
+        from googleapiclient.http import build_http
+
+        _shared_http = build_http()
+    return _shared_http
+
+
 def get_docs_service(
     creds: Optional[Union[Credentials, ServiceAccountCredentials]] = None,
 ):
@@ -156,20 +188,65 @@ def get_docs_service(
     1. If GOOGLE_SERVICE_ACCOUNT_KEY_FILE is set, uses service account auth
     2. Otherwise, uses OAuth 2.0 flow
 
+    The service built from the default credentials is created once per process
+    and reused by later calls.
+
     Args:
         creds: Existing credentials (will create new ones if not provided)
 
     Returns:
         Authenticated Google Docs API service object
     """
+    global _default_service
+
     if creds is None:
-        # Check for service account key file first
-        if os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY_FILE"):
-            creds = get_service_account_credentials()
-        else:
-            creds = get_credentials()
+        if _default_service is None:
+            # Check for service account key file first
+            if os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY_FILE"):
+                creds = get_service_account_credentials()
+            else:
+                creds = get_credentials()
+            _default_service = _build_docs_service(creds)
+        return _default_service
+
+    return _build_docs_service(creds)
 
-    return build("docs", "v1", credentials=creds)
+
+def _build_docs_service(creds: Union[Credentials, ServiceAccountCredentials]):
+    """Build a Docs API service that authorizes requests with creds over the shared connection."""
+    from google_auth_httplib2 import AuthorizedHttp
+    from googleapiclient.discovery import build
+
+    # Authorize the shared connection so every API call reuses the same TLS session
+    http = AuthorizedHttp(creds, http=_get_shared_http())
+
+    # Use the discovery document bundled with the client library instead of
+    # fetching it over the network (and skip the legacy discovery file cache)
+    return build("docs", "v1", http=http, static_discovery=True, cache_discovery=False)
+
+
+def get_principal() -> str:
+    """
+    Identify the credentials get_docs_service uses by default.
+
+    The identity is the credentials file plus its modification time, so a new
+    login or a replaced key file counts as a different principal. No
+    credentials are loaded.
+
+    Returns:
+        A string that differs between service account and OAuth logins
+    """
+    key_file = os.getenv("GOOGLE_SERVICE_ACCOUNT_KEY_FILE")
+    if key_file:
+        kind, path = "service_account", Path(key_file).expanduser()
+    else:
+        kind, path = "oauth", DEFAULT_CREDS_PATH
+
+    try:
+        modified = path.stat().st_mtime_ns
+    except OSError:
+        modified = None
+    return f"{kind}:{path}:{modified}"
 
 
 def revoke_credentials(creds_path: Optional[Path] = None) -> bool:
@@ -182,13 +259,19 @@ def revoke_credentials(creds_path: Optional[Path] = None) -> bool:
     Returns:
         True if credentials were deleted, False if they didn't exist
     """
+    global _default_service
+
     if creds_path is None:
         creds_path = DEFAULT_CREDS_PATH
 
-    if creds_path.exists():
+    # Don't keep using a service authorized with the revoked credentials
+    _default_service = None
+
+    try:
         creds_path.unlink()
-        print(f"Credentials deleted from {creds_path}")
-        return True
-    else:
+    except FileNotFoundError:
         print(f"No credentials found at {creds_path}")
         return False
+
+    print(f"Credentials deleted from {creds_path}")
+    return True
@@ -0,0 +1,109 @@
+"""
+Local state cache for gdoc-editor.
+
+Remembers the last revision ID seen for each document, so edits can be
+checked against the caller's last read without an extra API round trip.
+"""
+
+import os
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Default directory for cached state
+DEFAULT_CACHE_DIR = Path.home() / ".gdoc-cache"
+
+# File (inside the cache directory) mapping document IDs to revision entries
+REVISIONS_FILE = "revisions.json"
+
+# How long a cached revision ID is used for. The Docs API only guarantees a
+# returned revision ID stays valid for 24 hours.
+REVISION_TTL_SECONDS = 24 * 60 * 60
+
+
+def _load_revisions(cache_dir: Path) -> Dict[str, Any]:
+    """Load the document ID -> revision entry map, or an empty map if unavailable."""
+    try:
+        with open(cache_dir / REVISIONS_FILE, "rb") as f:
+            revisions = json.loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return revisions if isinstance(revisions, dict) else {}
+
+
+def get_cached_revision(
+    document_id: str,
+    principal: Optional[str] = None,
+    cache_dir: Optional[Path] = None
+) -> Optional[str]:
+    """
+    Get the last revision ID seen for a document.
+
+    Entries older than REVISION_TTL_SECONDS, or recorded for a different
+    principal, are treated as missing: the API doesn't accept them.
+
+    Args:
+        document_id: The ID of the document
+        principal: Identity the revision must have been recorded for (see save_revision)
+        cache_dir: Cache directory (default: ~/.gdoc-cache)
+
+    Returns:
+        The cached revision ID, or None if there is no usable entry
+    """
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+
+    entry = _load_revisions(cache_dir).get(document_id)
+    if not isinstance(entry, dict) or entry.get("principal") != principal:
+        return None
+
+    saved_at = entry.get("savedAt")
+    if not isinstance(saved_at, (int, float)) or time.time() - saved_at >= REVISION_TTL_SECONDS:
+        return None
+
+    revision_id = entry.get("revisionId")
+    return revision_id if isinstance(revision_id, str) else None
+
+
+def save_revision(
+    document_id: str,
+    revision_id: Optional[str],
+    principal: Optional[str] = None,
+    cache_dir: Optional[Path] = None
+) -> None:
+    """
+    Record the latest revision ID seen for a document.
+
+    Failures are reported as warnings; the cache is an optimization and never
+    blocks a command.
+
+    Args:
+        document_id: The ID of the document
+        revision_id: The revision ID to record (ignored if empty)
+        principal: Identity the revision was read as (revision IDs can't be shared across users)
+        cache_dir: Cache directory (default: ~/.gdoc-cache)
+    """
+    if not revision_id:
+        return
+
+    if cache_dir is None:
+        cache_dir = DEFAULT_CACHE_DIR
+
+    revisions = _load_revisions(cache_dir)
+    revisions[document_id] = {
+        "revisionId": revision_id,
+        "principal": principal,
+        "savedAt": time.time(),
+    }
+
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial file
+        tmp_path = cache_dir / f"{REVISIONS_FILE}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(revisions, f)
+        os.replace(tmp_path, cache_dir / REVISIONS_FILE)
+    except OSError as e:
+        print(f"Warning: Could not save revision cache: {e}", file=sys.stderr)
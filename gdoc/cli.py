@@ -4,28 +4,118 @@ CLI interface for gdoc-editor.
 Provides command-line access to Google Docs reading and editing operations.
 """
 
+import os
+import re
 import sys
 import argparse
 import json
+from functools import lru_cache
 from pathlib import Path
-from typing import Optional
-
-from dotenv import load_dotenv
+from typing import Final, Optional
 
 from gdoc import __version__
-from gdoc.auth import get_docs_service, revoke_credentials, AuthenticationError
-from gdoc.reader import read_document, find_section
-from gdoc.editor import insert_text, delete_text, replace_text, batch_edit
-from gdoc.markdown import insert_markdown
 
 
-def setup_parser() -> argparse.ArgumentParser:
-    """Set up the command-line argument parser."""
-    parser = argparse.ArgumentParser(
-        prog="gdoc-cli",
-        description="CLI tool for programmatic Google Docs editing",
-        formatter_class=argparse.RawDescriptionHelpFormatter,
-        epilog="""
+# Escape sequences decoded in CLI text arguments
+_ESCAPE_RE = re.compile(r"\\(.)")
+_ESCAPE_MAP = {"n": "\n", "\\": "\\"}
+
+# Document ID in a Google Docs URL like https://docs.google.com/document/d/DOC_ID/edit
+# (or .../document/u/0/d/DOC_ID/edit when several accounts are signed in)
+_DOC_ID_RE = re.compile(r"/d/([^/?#]+)")
+
+# Extra ArgumentParser options. Python 3.14+ colorizes help by default, which makes
+# every add_argument call check the terminal and colour environment variables.
+_PARSER_KWARGS = {"color": False} if sys.version_info >= (3, 14) else {}
+
+# Choices for insert --style and --bullet
+_STYLE_CHOICES = (
+    "NORMAL_TEXT", "HEADING_1", "HEADING_2", "HEADING_3", "HEADING_4", "HEADING_5", "HEADING_6",
+    "TITLE", "SUBTITLE",
+)
+_BULLET_CHOICES = (
+    "BULLET_DISC_CIRCLE_SQUARE", "BULLET_DIAMONDX_ARROW3D_SQUARE", "BULLET_CHECKBOX",
+    "BULLET_ARROW_DIAMOND_DISC", "NUMBERED_DECIMAL_ALPHA_ROMAN", "NUMBERED_DECIMAL_ALPHA_ROMAN_PARENS",
+    "NUMBERED_DECIMAL_NESTED", "NUMBERED_UPPERALPHA_ALPHA_ROMAN", "NUMBERED_UPPERROMAN_UPPERALPHA_DECIMAL",
+    "NUMBERED_ZERODECIMAL_ALPHA_ROMAN",
+)
+
+
+@lru_cache(maxsize=None)
+def _orjson():
+    """Import orjson on first use, or return None if it isn't installed."""
+    try:
+        import orjson
+    except ImportError:  # orjson is an optional speedup; fall back to stdlib json
+        return None
+    return orjson
+
+
+def _emit(obj, pretty: bool = True) -> None:
+    """Write a result to stdout as JSON (indented, or compact if not pretty), encoded as UTF-8."""
+    json_options = {"indent": 2} if pretty else {"separators": (",", ":")}
+    stdout_buffer = getattr(sys.stdout, "buffer", None)
+    if stdout_buffer is None:
+        # No binary stream to write UTF-8 to (e.g. a StringIO), so escape non-ASCII text
+        sys.stdout.write(json.dumps(obj, **json_options) + "\n")
+        return
+
+    orjson = _orjson()
+    if orjson is not None:
+        data = orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+    else:
+        # Built in full before writing, so an encoding error never leaves partial JSON on stdout
+        data = json.dumps(obj, ensure_ascii=False, **json_options).encode("utf-8")
+
+    # Write the UTF-8 bytes straight to the binary buffer, bypassing the locale's text
+    # encoder, so output is the same with and without orjson on any stdout encoding
+    sys.stdout.flush()
+    stdout_buffer.write(data)
+    stdout_buffer.write(b"\n")
+
+
+def _loads(data):
+    """Deserialize JSON from a str or bytes payload."""
+    orjson = _orjson()
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Operations files at least this large are memory-mapped rather than read (orjson only)
+_MMAP_THRESHOLD = 1 << 20
+
+
+def _read_operations(path: str):
+    """
+    Load a batch operations JSON file.
+
+    Large files are parsed straight from a read-only memory map when orjson
+    is available, so the file's bytes are never copied into a Python object.
+
+    Args:
+        path: Path to the JSON operations file
+
+    Returns:
+        The decoded JSON value
+    """
+    orjson = _orjson()
+    if orjson is not None and os.path.getsize(path) >= _MMAP_THRESHOLD:
+        import mmap
+
+        # Unbuffered: the file is only mapped, never read through the file object
+        with open(path, "rb", buffering=0) as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    return orjson.loads(view)
+
+    # read() with no size reads the whole file in one call, sized from the file itself
+    with open(path, "rb") as f:
+        return _loads(f.read())
+
+
+# Examples and workflow notes shown at the end of top-level --help
+_EPILOG: Final[str] = """
 Basic workflow:
   1. Read the document to get structure and indices
   2. Find sections or calculate target indices
@@ -87,132 +177,255 @@ Bullet presets:
 
 More info:
   Full documentation: https://github.com/defaye/gdoc-editor
-        """,
-    )
+"""
 
-    parser.add_argument(
-        "--version",
-        action="version",
-        version=f"gdoc-cli {__version__}"
-    )
 
-    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+@lru_cache(maxsize=None)
+def _document_parent() -> argparse.ArgumentParser:
+    """Parent parser with the document_id argument taken by every document command."""
+    parent = argparse.ArgumentParser(add_help=False, **_PARSER_KWARGS)
+    parent.add_argument("document_id", help="Google Doc ID or full URL")
+    return parent
+
+
+@lru_cache(maxsize=None)
+def _edit_parent() -> argparse.ArgumentParser:
+    """Parent parser with the revision check and preview options shared by edit commands."""
+    parent = argparse.ArgumentParser(add_help=False, **_PARSER_KWARGS)
+    parent.add_argument("--force", action="store_true", help="Skip revision safety check")
+    parent.add_argument("--expected-revision", metavar="REV", help="Revision ID the document must still be at (e.g. revisionId from a previous read)")
+    parent.add_argument("--dry-run", action="store_true", help="Preview the operation without executing")
+    return parent
 
-    # Read command
+
+def _build_read_parser(subparsers) -> None:
+    """Add the read subcommand."""
     read_parser = subparsers.add_parser(
         "read",
+        parents=[_document_parent()],
         help="Read document structure and content",
         description="Fetch the full document with structure (headings, paragraphs) and character indices"
     )
-    read_parser.add_argument("document_id", help="Google Doc ID or full URL")
     read_parser.add_argument(
         "--format",
-        choices=["json", "text"],
+        choices=("json", "text"),
         default="json",
         help="Output format: 'json' for structured data (default), 'text' for plain text",
     )
+    read_parser.add_argument(
+        "--compact",
+        action="store_true",
+        help="Print JSON on one line without indentation (smaller output for large documents)",
+    )
+    read_parser.set_defaults(func=handle_read)
+
+
+class _TextFormatFlag(argparse.Action):
+    """Flag that ORs its text format bit into args.text_format."""
+
+    def __init__(self, option_strings, dest, flag, **kwargs):
+        super().__init__(option_strings, "text_format", nargs=0, default=0, **kwargs)
+        self.flag = flag
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        setattr(namespace, self.dest, getattr(namespace, self.dest, 0) | self.flag)
+
+
+def _build_insert_parser(subparsers) -> None:
+    """Add the insert subcommand."""
+    from gdoc.editor import BOLD, ITALIC, UNDERLINE, STRIKETHROUGH, CODE
 
-    # Insert command
     insert_parser = subparsers.add_parser(
         "insert",
+        parents=[_document_parent(), _edit_parent()],
         help="Insert text at a specific index",
         description="Insert text at a character index with optional styling and bullet formatting"
     )
-    insert_parser.add_argument("document_id", help="Google Doc ID or full URL")
     insert_parser.add_argument("index", type=int, help="Character index where text should be inserted (0-based)")
     insert_parser.add_argument("text", help="Text to insert (use \\n for newlines)")
     insert_parser.add_argument(
         "--style",
-        choices=["NORMAL_TEXT", "HEADING_1", "HEADING_2", "HEADING_3", "HEADING_4", "HEADING_5", "HEADING_6", "TITLE", "SUBTITLE"],
+        choices=_STYLE_CHOICES,
         help="Paragraph style (auto-applies NORMAL_TEXT if text ends with \\n)"
     )
     insert_parser.add_argument(
         "--bullet",
-        choices=["BULLET_DISC_CIRCLE_SQUARE", "BULLET_DIAMONDX_ARROW3D_SQUARE", "BULLET_CHECKBOX",
-                 "BULLET_ARROW_DIAMOND_DISC", "NUMBERED_DECIMAL_ALPHA_ROMAN", "NUMBERED_DECIMAL_ALPHA_ROMAN_PARENS",
-                 "NUMBERED_DECIMAL_NESTED", "NUMBERED_UPPERALPHA_ALPHA_ROMAN", "NUMBERED_UPPERROMAN_UPPERALPHA_DECIMAL",
-                 "NUMBERED_ZERODECIMAL_ALPHA_ROMAN"],
+        choices=_BULLET_CHOICES,
         help="Apply bullet/numbered list formatting to inserted paragraphs"
     )
-    insert_parser.add_argument("--bold", action="store_true", help="Make text bold")
-    insert_parser.add_argument("--italic", action="store_true", help="Make text italic")
-    insert_parser.add_argument("--underline", action="store_true", help="Underline text")
-    insert_parser.add_argument("--strikethrough", action="store_true", help="Add strikethrough to text")
-    insert_parser.add_argument("--code", action="store_true", help="Apply monospace font for code (Courier New)")
-    insert_parser.add_argument("--force", action="store_true", help="Skip revision safety check")
-    insert_parser.add_argument("--dry-run", action="store_true", help="Preview the operation without executing")
-
-    # Delete command
+    insert_parser.add_argument("--bold", action=_TextFormatFlag, flag=BOLD, help="Make text bold")
+    insert_parser.add_argument("--italic", action=_TextFormatFlag, flag=ITALIC, help="Make text italic")
+    insert_parser.add_argument("--underline", action=_TextFormatFlag, flag=UNDERLINE, help="Underline text")
+    insert_parser.add_argument("--strikethrough", action=_TextFormatFlag, flag=STRIKETHROUGH, help="Add strikethrough to text")
+    insert_parser.add_argument("--code", action=_TextFormatFlag, flag=CODE, help="Apply monospace font for code (Courier New)")
+    insert_parser.set_defaults(func=handle_insert)
+
+
+def _build_delete_parser(subparsers) -> None:
+    """Add the delete subcommand."""
     delete_parser = subparsers.add_parser(
         "delete",
+        parents=[_document_parent(), _edit_parent()],
         help="Delete a range of text",
         description="Delete text between start and end indices (start inclusive, end exclusive)"
     )
-    delete_parser.add_argument("document_id", help="Google Doc ID or full URL")
     delete_parser.add_argument("start_index", type=int, help="Start of range to delete (inclusive)")
     delete_parser.add_argument("end_index", type=int, help="End of range to delete (exclusive)")
-    delete_parser.add_argument("--force", action="store_true", help="Skip revision safety check")
-    delete_parser.add_argument("--dry-run", action="store_true", help="Preview the operation without executing")
+    delete_parser.set_defaults(func=handle_delete)
+
 
-    # Replace command
+def _build_replace_parser(subparsers) -> None:
+    """Add the replace subcommand."""
     replace_parser = subparsers.add_parser(
         "replace",
+        parents=[_document_parent(), _edit_parent()],
         help="Replace a range with new text",
         description="Replace text between start and end indices with new text"
     )
-    replace_parser.add_argument("document_id", help="Google Doc ID or full URL")
     replace_parser.add_argument("start_index", type=int, help="Start of range to replace (inclusive)")
     replace_parser.add_argument("end_index", type=int, help="End of range to replace (exclusive)")
     replace_parser.add_argument("text", help="Replacement text (use \\n for newlines)")
-    replace_parser.add_argument("--force", action="store_true", help="Skip revision safety check")
-    replace_parser.add_argument("--dry-run", action="store_true", help="Preview the operation without executing")
+    replace_parser.set_defaults(func=handle_replace)
 
-    # Find command
+
+def _build_find_parser(subparsers) -> None:
+    """Add the find subcommand."""
     find_parser = subparsers.add_parser(
         "find",
+        parents=[_document_parent()],
         help="Find a section by heading text",
         description="Locate a section by its heading and return the heading and content ranges"
     )
-    find_parser.add_argument("document_id", help="Google Doc ID or full URL")
     find_parser.add_argument("heading", help="Heading text to search for (partial match supported)")
+    find_parser.set_defaults(func=handle_find)
+
 
-    # Insert markdown command
+def _build_insert_md_parser(subparsers) -> None:
+    """Add the insert-md subcommand."""
     insert_md_parser = subparsers.add_parser(
         "insert-md",
+        parents=[_document_parent(), _edit_parent()],
         help="Insert markdown-formatted text (FAST!)",
         description="Insert markdown text with automatic formatting. Supports headings, bold, italic, lists, and code. Much faster than multiple insert operations."
     )
-    insert_md_parser.add_argument("document_id", help="Google Doc ID or full URL")
     insert_md_parser.add_argument("index", type=int, help="Character index where text should be inserted (0-based)")
     insert_md_parser.add_argument("text", nargs='?', help="Markdown text to insert (or use --file)")
     insert_md_parser.add_argument("--file", help="Path to markdown file to insert")
-    insert_md_parser.add_argument("--force", action="store_true", help="Skip revision safety check")
-    insert_md_parser.add_argument("--dry-run", action="store_true", help="Preview the operation without executing")
+    insert_md_parser.set_defaults(func=handle_insert_md)
 
-    # Batch command
+
+def _build_batch_parser(subparsers) -> None:
+    """Add the batch subcommand."""
     batch_parser = subparsers.add_parser(
         "batch",
+        parents=[_document_parent()],
         help="Execute multiple operations from JSON file",
-        description="Run multiple insert/delete/replace operations atomically from a JSON file"
+        description="Run multiple insert/delete/replace operations from a JSON file. Up to 500 API requests (a replace is two) are applied atomically; larger batches are split into consecutive calls."
     )
-    batch_parser.add_argument("document_id", help="Google Doc ID or full URL")
     batch_parser.add_argument("operations_file", help="Path to JSON file with operations array")
     batch_parser.add_argument("--dry-run", action="store_true", help="Preview the operations without executing")
+    batch_parser.set_defaults(func=handle_batch)
+
 
-    # Logout command
+def _build_logout_parser(subparsers) -> None:
+    """Add the logout subcommand."""
     subparsers.add_parser(
         "logout",
         help="Revoke and delete stored credentials",
         description="Remove stored OAuth credentials (service account keys are not affected)"
     )
 
-    # Whoami command
+
+def _build_whoami_parser(subparsers) -> None:
+    """Add the whoami subcommand."""
     subparsers.add_parser(
         "whoami",
         help="Show service account email for document sharing",
         description="Display the service account email address that needs Editor access to documents"
     )
 
+
+# Subcommand name -> function that adds its parser
+_SUBCOMMAND_BUILDERS = {
+    "read": _build_read_parser,
+    "insert": _build_insert_parser,
+    "delete": _build_delete_parser,
+    "replace": _build_replace_parser,
+    "find": _build_find_parser,
+    "insert-md": _build_insert_md_parser,
+    "batch": _build_batch_parser,
+    "logout": _build_logout_parser,
+    "whoami": _build_whoami_parser,
+}
+
+
+class _StandaloneSubparsers:
+    """
+    Stand-in for argparse's subparsers action.
+
+    Lets a _build_*_parser function create its command as a standalone
+    top-level parser (prog "gdoc-cli <command>"), so a known command can be
+    parsed without building the top-level parser at all.
+    """
+
+    def __init__(self):
+        self.parser = None
+
+    def add_parser(self, name: str, **kwargs) -> argparse.ArgumentParser:
+        kwargs.pop("help", None)  # only meaningful in the top-level command list
+        self.parser = argparse.ArgumentParser(prog=f"gdoc-cli {name}", **_PARSER_KWARGS, **kwargs)
+        self.parser.set_defaults(command=name)
+        return self.parser
+
+
+@lru_cache(maxsize=None)
+def command_parser(command: str) -> argparse.ArgumentParser:
+    """
+    Build the argument parser for a single known subcommand.
+
+    The parser is built once per command and reused on later calls.
+
+    Args:
+        command: Subcommand name (must be a key of _SUBCOMMAND_BUILDERS)
+
+    Returns:
+        Parser for the subcommand's own arguments (excluding the command name)
+    """
+    subparsers = _StandaloneSubparsers()
+    _SUBCOMMAND_BUILDERS[command](subparsers)
+    return subparsers.parser
+
+
+@lru_cache(maxsize=None)
+def setup_parser() -> argparse.ArgumentParser:
+    """
+    Set up the full command-line argument parser with every subcommand.
+
+    Only needed for top-level --help/--version and to report a missing or
+    invalid command; known commands are parsed with command_parser().
+    The parser is built once and reused on later calls.
+
+    Returns:
+        The configured argument parser
+    """
+    parser = argparse.ArgumentParser(
+        prog="gdoc-cli",
+        description="CLI tool for programmatic Google Docs editing",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=_EPILOG,
+        **_PARSER_KWARGS,
+    )
+
+    parser.add_argument(
+        "--version",
+        action="version",
+        version=f"gdoc-cli {__version__}"
+    )
+
+    subparsers = parser.add_subparsers(dest="command", help="Command to execute")
+    for build_subparser in _SUBCOMMAND_BUILDERS.values():
+        build_subparser(subparsers)
+
     return parser
 
 
@@ -226,21 +439,28 @@ def extract_document_id(doc_id_or_url: str) -> str:
     Returns:
         Document ID
     """
-    if "docs.google.com" in doc_id_or_url:
-        # Extract ID from URL like: https://docs.google.com/document/d/DOC_ID/edit
-        parts = doc_id_or_url.split("/")
-        if "d" in parts:
-            id_index = parts.index("d") + 1
-            if id_index < len(parts):
-                return parts[id_index]
-    return doc_id_or_url
+    # Bare document IDs never contain a slash
+    if "/" not in doc_id_or_url:
+        return doc_id_or_url
+
+    match = _DOC_ID_RE.search(doc_id_or_url)
+    return match.group(1) if match else doc_id_or_url
 
 
 def handle_read(args, service):
     """Handle the read command."""
+    from gdoc.reader import get_document, parse_document_structure
+
     doc_id = extract_document_id(args.document_id)
-    output = read_document(service, doc_id, format=args.format)
-    print(output)
+    parsed = parse_document_structure(get_document(service, doc_id))
+
+    # Remember the revision we read so later edits are checked against it
+    record_revision(doc_id, parsed["revisionId"])
+
+    if args.format == "text":
+        print(parsed["fullText"])
+    else:
+        _emit(parsed, pretty=not args.compact)
 
 
 def get_revision_id(service, document_id: str) -> str:
@@ -254,8 +474,10 @@ def get_revision_id(service, document_id: str) -> str:
     Returns:
         The document's current revision ID
     """
+    from gdoc.editor import documents_resource
+
     try:
-        doc = service.documents().get(documentId=document_id, fields="revisionId").execute()
+        doc = documents_resource(service).get(documentId=document_id, fields="revisionId").execute()
         return doc.get("revisionId")
     except Exception as e:
         # If we can't get revision ID, return None (will skip safety check)
@@ -263,28 +485,72 @@ def get_revision_id(service, document_id: str) -> str:
         return None
 
 
+def resolve_revision_id(args, service, document_id: str) -> Optional[str]:
+    """
+    Get the revision ID an edit should be checked against.
+
+    An explicit --expected-revision is used as given. Otherwise the revision
+    recorded by the last read or edit of this document is used (if it was
+    recorded under the same credentials within the last 24 hours), and the API
+    is only asked for the current revision if none has been recorded (never
+    for a dry run, which previews the recorded revision without an API call).
+
+    Args:
+        args: Parsed arguments (honours --force, --expected-revision and --dry-run)
+        service: Authenticated Google Docs API service
+        document_id: The ID of the document
+
+    Returns:
+        The required revision ID, or None to skip the safety check
+    """
+    from gdoc.auth import get_principal
+    from gdoc.cache import get_cached_revision
+
+    if args.force:
+        return None
+    if args.expected_revision:
+        return args.expected_revision
+    cached_revision = get_cached_revision(document_id, get_principal())
+    if cached_revision or args.dry_run:
+        return cached_revision
+    return get_revision_id(service, document_id)
+
+
+def record_revision(document_id: str, revision_id: Optional[str]) -> None:
+    """Record a revision ID seen for a document under the current credentials."""
+    from gdoc.auth import get_principal
+    from gdoc.cache import save_revision
+
+    save_revision(document_id, revision_id, get_principal())
+
+
+def remember_revision(document_id: str, result) -> None:
+    """Record the revision ID returned by a batchUpdate response."""
+    write_control = result.get("writeControl") or {}
+    record_revision(document_id, write_control.get("requiredRevisionId"))
+
+
 def decode_escape_sequences(text: str) -> str:
     """
     Decode escape sequences like \\n and \\\\.
 
     Handles the case where bash passes literal backslash-n instead of a newline.
-    Processes escape sequences in the correct order to handle escaped backslashes.
+    Escapes are matched in a single left-to-right pass, so escaped backslashes are handled correctly.
 
     Note: Google Docs does not visually render tab characters, so \\t is not supported.
     """
-    # Process escape sequences in order (escaped backslashes first)
-    replacements = [
-        ('\\\\', '\x00'),  # Temporarily replace \\\\ with null byte
-        ('\\n', '\n'),     # Replace \\n with newline
-        ('\x00', '\\'),    # Restore single backslashes
-    ]
-    for old, new in replacements:
-        text = text.replace(old, new)
-    return text
+    if "\\" not in text:
+        return text
+
+    # Single left-to-right pass: an escaped backslash is consumed before it can start another escape.
+    # Unknown escapes are left as they are.
+    return _ESCAPE_RE.sub(lambda m: _ESCAPE_MAP.get(m.group(1), m.group(0)), text)
 
 
 def handle_insert(args, service):
     """Handle the insert command."""
+    from gdoc.editor import TEXT_FORMAT_NAMES, insert_text
+
     doc_id = extract_document_id(args.document_id)
 
     # Decode escape sequences (e.g., convert literal \\n to actual newline)
@@ -296,9 +562,7 @@ def handle_insert(args, service):
         paragraph_style = 'NORMAL_TEXT'
 
     # Get revision ID for safety check (unless --force is used)
-    revision_id = None
-    if not args.force and not args.dry_run:
-        revision_id = get_revision_id(service, doc_id)
+    revision_id = resolve_revision_id(args, service, doc_id)
 
     result = insert_text(
         service,
@@ -307,32 +571,18 @@ def handle_insert(args, service):
         text,
         paragraph_style=paragraph_style,
         bullet_preset=args.bullet,
-        bold=args.bold,
-        italic=args.italic,
-        underline=args.underline,
-        strikethrough=args.strikethrough,
-        code=args.code,
+        text_format=args.text_format,
         required_revision_id=revision_id,
         dry_run=args.dry_run
     )
-    print(json.dumps(result, indent=2))
+    _emit(result)
     if not args.dry_run:
+        remember_revision(doc_id, result)
         style_msg = f" with style {paragraph_style}" if paragraph_style else ""
         bullet_msg = f" as {args.bullet} list" if args.bullet else ""
 
         # Build text formatting message
-        format_parts = []
-        if args.bold:
-            format_parts.append("bold")
-        if args.italic:
-            format_parts.append("italic")
-        if args.underline:
-            format_parts.append("underline")
-        if args.strikethrough:
-            format_parts.append("strikethrough")
-        if args.code:
-            format_parts.append("code")
-
+        format_parts = [name for flag, name in TEXT_FORMAT_NAMES if args.text_format & flag]
         format_msg = f" ({', '.join(format_parts)})" if format_parts else ""
 
         print(f"\n✓ Inserted text at index {args.index}{style_msg}{bullet_msg}{format_msg}")
@@ -340,6 +590,8 @@ def handle_insert(args, service):
 
 def handle_insert_md(args, service):
     """Handle the insert-md command."""
+    from gdoc.markdown import insert_markdown
+
     doc_id = extract_document_id(args.document_id)
 
     # Get markdown text from argument or file
@@ -358,9 +610,7 @@ def handle_insert_md(args, service):
         sys.exit(1)
 
     # Get revision ID for safety check (unless --force is used)
-    revision_id = None
-    if not args.force and not args.dry_run:
-        revision_id = get_revision_id(service, doc_id)
+    revision_id = resolve_revision_id(args, service, doc_id)
 
     result = insert_markdown(
         service,
@@ -370,19 +620,20 @@ def handle_insert_md(args, service):
         required_revision_id=revision_id,
         dry_run=args.dry_run
     )
-    print(json.dumps(result, indent=2))
+    _emit(result)
     if not args.dry_run:
+        remember_revision(doc_id, result)
         print(f"\n✓ Inserted markdown at index {args.index}")
 
 
 def handle_delete(args, service):
     """Handle the delete command."""
+    from gdoc.editor import delete_text
+
     doc_id = extract_document_id(args.document_id)
 
     # Get revision ID for safety check (unless --force is used)
-    revision_id = None
-    if not args.force and not args.dry_run:
-        revision_id = get_revision_id(service, doc_id)
+    revision_id = resolve_revision_id(args, service, doc_id)
 
     result = delete_text(
         service,
@@ -392,22 +643,23 @@ def handle_delete(args, service):
         required_revision_id=revision_id,
         dry_run=args.dry_run
     )
-    print(json.dumps(result, indent=2))
+    _emit(result)
     if not args.dry_run:
+        remember_revision(doc_id, result)
         print(f"\n✓ Deleted range [{args.start_index}, {args.end_index})")
 
 
 def handle_replace(args, service):
     """Handle the replace command."""
+    from gdoc.editor import replace_text
+
     doc_id = extract_document_id(args.document_id)
 
     # Decode escape sequences (e.g., convert literal \\n to actual newline)
     text = decode_escape_sequences(args.text)
 
     # Get revision ID for safety check (unless --force is used)
-    revision_id = None
-    if not args.force and not args.dry_run:
-        revision_id = get_revision_id(service, doc_id)
+    revision_id = resolve_revision_id(args, service, doc_id)
 
     result = replace_text(
         service,
@@ -418,17 +670,22 @@ def handle_replace(args, service):
         required_revision_id=revision_id,
         dry_run=args.dry_run
     )
-    print(json.dumps(result, indent=2))
+    _emit(result)
     if not args.dry_run:
+        remember_revision(doc_id, result)
         print(f"\n✓ Replaced range [{args.start_index}, {args.end_index}) with new text")
 
 
 def handle_find(args, service):
     """Handle the find command."""
+    from gdoc.reader import find_section
+
     doc_id = extract_document_id(args.document_id)
     result = find_section(service, doc_id, args.heading)
     if result:
-        print(json.dumps(result, indent=2))
+        # The indices found are from this revision, so later edits are checked against it
+        record_revision(doc_id, result["revisionId"])
+        _emit(result)
     else:
         print(f"Section with heading '{args.heading}' not found", file=sys.stderr)
         sys.exit(1)
@@ -436,30 +693,33 @@ def handle_find(args, service):
 
 def handle_batch(args, service):
     """Handle the batch command."""
+    from gdoc.editor import batch_edit
+
     doc_id = extract_document_id(args.document_id)
 
     # Load operations from JSON file
     try:
-        with open(args.operations_file, "r") as f:
-            operations = json.load(f)
+        operations = _read_operations(args.operations_file)
     except Exception as e:
         print(f"Error loading operations file: {e}", file=sys.stderr)
         sys.exit(1)
 
     result = batch_edit(service, doc_id, operations, dry_run=args.dry_run)
-    print(json.dumps(result, indent=2))
+    _emit(result)
     if not args.dry_run:
+        remember_revision(doc_id, result)
         print(f"\n✓ Executed {len(operations)} operations")
 
 
 def handle_logout(args):
     """Handle the logout command."""
+    from gdoc.auth import revoke_credentials
+
     revoke_credentials()
 
 
 def handle_whoami(args):
     """Handle the whoami command."""
-    import os
     import json
 
     key_file = os.environ.get('GOOGLE_SERVICE_ACCOUNT_KEY_FILE')
@@ -489,26 +749,47 @@ def handle_whoami(args):
 
 def main():
     """Main CLI entry point."""
-    # Load environment variables from .env file
-    load_dotenv()
+    argv = sys.argv[1:]
+
+    # Bare logout takes no arguments, so no parser is needed at all
+    if argv == ["logout"]:
+        handle_logout(None)
+        return
 
-    parser = setup_parser()
-    args = parser.parse_args()
+    if argv and argv[0] in _SUBCOMMAND_BUILDERS:
+        # Known command: dispatch on it directly and build only that command's parser
+        args = command_parser(argv[0]).parse_args(argv[1:])
+    else:
+        # No command, top-level options or an invalid command: use the full parser
+        parser = setup_parser()
+        args = parser.parse_args(argv)
 
-    if not args.command:
-        parser.print_help()
-        sys.exit(1)
+        if not args.command:
+            parser.print_help()
+            sys.exit(1)
 
     # Handle commands that don't need API service
     if args.command == "logout":
         handle_logout(args)
         return
 
+    # Load environment variables from a .env file in the working directory, if there is one
+    env_path = Path(".env")
+    if env_path.exists():
+        from dotenv import load_dotenv
+        load_dotenv(env_path)
+
     if args.command == "whoami":
         handle_whoami(args)
         return
 
-    # Get authenticated service
+    # Get authenticated service (Google API libraries are only imported from here on)
+    try:
+        from gdoc.auth import get_docs_service, AuthenticationError
+    except ImportError as e:
+        print(f"Error loading Google API libraries: {e}", file=sys.stderr)
+        sys.exit(1)
+
     try:
         service = get_docs_service()
     except AuthenticationError as e:
@@ -518,25 +799,9 @@ def main():
         print(f"Error initializing service: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Route to command handlers
+    # Route to the command handler registered by its subparser
     try:
-        if args.command == "read":
-            handle_read(args, service)
-        elif args.command == "insert":
-            handle_insert(args, service)
-        elif args.command == "insert-md":
-            handle_insert_md(args, service)
-        elif args.command == "delete":
-            handle_delete(args, service)
-        elif args.command == "replace":
-            handle_replace(args, service)
-        elif args.command == "find":
-            handle_find(args, service)
-        elif args.command == "batch":
-            handle_batch(args, service)
-        else:
-            print(f"Unknown command: {args.command}", file=sys.stderr)
-            sys.exit(1)
+        args.func(args, service)
     except Exception as e:
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
@@ -5,38 +5,112 @@ Handles insert, delete, and replace operations on Google Docs
 with proper index management and batch operation support.
 """
 
-from typing import List, Dict, Any, Optional
+import re
+from typing import Iterable, List, Dict, Any, Optional
+from weakref import WeakKeyDictionary
+
+# Bit flags for insert_text's text_format mask
+BOLD = 1
+ITALIC = 2
+UNDERLINE = 4
+STRIKETHROUGH = 8
+CODE = 16
+
+# Maximum number of requests sent in one batchUpdate call
+MAX_REQUESTS_PER_BATCH = 500
+
+# HTTP statuses the API uses for a failed request precondition such as writeControl
+_PRECONDITION_STATUSES = (400, 409, 412)
+
+# Marks a revision mismatch in an API error body
+_REVISION_CONFLICT_RE = re.compile(rb"requiredRevisionId|(?i:document has been modified)")
+
+# Service -> its documents() resource (building one binds every API method afresh)
+_documents_resources = WeakKeyDictionary()
+
+# (flag, textStyle properties, field mask entry) for each text format
+_TEXT_FORMATS = (
+    (BOLD, {"bold": True}, "bold"),
+    (ITALIC, {"italic": True}, "italic"),
+    (UNDERLINE, {"underline": True}, "underline"),
+    (STRIKETHROUGH, {"strikethrough": True}, "strikethrough"),
+    (CODE, {"weightedFontFamily": {"fontFamily": "Courier New"}}, "weightedFontFamily"),
+)
+
+# (flag, display name) for each text format
+TEXT_FORMAT_NAMES = (
+    (BOLD, "bold"),
+    (ITALIC, "italic"),
+    (UNDERLINE, "underline"),
+    (STRIKETHROUGH, "strikethrough"),
+    (CODE, "code"),
+)
+
+
+class PartialUpdateError(Exception):
+    """
+    Raised when a multi-call batch update fails after some calls were applied.
+
+    Attributes:
+        applied_requests: Number of requests already applied to the document
+        total_requests: Number of requests in the whole update
+        revision_id: Revision ID the applied requests produced
+    """
+
+    def __init__(
+        self,
+        message: str,
+        applied_requests: int,
+        total_requests: int,
+        revision_id: Optional[str]
+    ):
+        super().__init__(message)
+        self.applied_requests = applied_requests
+        self.total_requests = total_requests
+        self.revision_id = revision_id
 
 
 class EditOperation:
     """Represents a single edit operation."""
 
+    __slots__ = ("op_type", "start_index", "end_index", "text")
+
     def __init__(self, op_type: str, start_index: int, end_index: Optional[int] = None, text: Optional[str] = None):
         self.op_type = op_type  # "insert", "delete", or "replace"
         self.start_index = start_index
         self.end_index = end_index
         self.text = text
 
-    def to_request(self) -> Dict[str, Any]:
-        """Convert to Google Docs API request format."""
-        if self.op_type == "insert":
-            return {
-                "insertText": {
-                    "location": {"index": self.start_index},
-                    "text": self.text,
-                }
+    def _insert_request(self) -> Dict[str, Any]:
+        return {
+            "insertText": {
+                "location": {"index": self.start_index},
+                "text": self.text,
             }
-        elif self.op_type == "delete":
-            return {
-                "deleteContentRange": {
-                    "range": {
-                        "startIndex": self.start_index,
-                        "endIndex": self.end_index,
-                    }
+        }
+
+    def _delete_request(self) -> Dict[str, Any]:
+        return {
+            "deleteContentRange": {
+                "range": {
+                    "startIndex": self.start_index,
+                    "endIndex": self.end_index,
                 }
             }
-        else:
+        }
+
+    # op_type -> method that builds its API request
+    _REQUEST_BUILDERS = {
+        "insert": _insert_request,
+        "delete": _delete_request,
+    }
+
+    def to_request(self) -> Dict[str, Any]:
+        """Convert to Google Docs API request format."""
+        build_request = self._REQUEST_BUILDERS.get(self.op_type)
+        if build_request is None:
             raise ValueError(f"Unknown operation type: {self.op_type}")
+        return build_request(self)
 
     def __repr__(self):
         if self.op_type == "insert":
@@ -47,6 +121,131 @@ class EditOperation:
             return f"Unknown operation: {self.op_type}"
 
 
+def documents_resource(service):
+    """
+    Get the service's documents() resource, reusing it across calls.
+
+    Building the resource binds every documents method from the discovery
+    document, which costs far more than the lookup.
+
+    Args:
+        service: Authenticated Google Docs API service
+
+    Returns:
+        The service's documents resource
+    """
+    try:
+        return _documents_resources[service]
+    except (KeyError, TypeError):  # TypeError: service can't be weakly referenced
+        pass
+
+    documents = service.documents()
+    try:
+        _documents_resources[service] = documents
+    except TypeError:
+        pass
+    return documents
+
+
+def _raise_for_revision_conflict(error: Exception) -> None:
+    """
+    Re-raise a batchUpdate failure caused by the document changing since the required revision.
+
+    API errors (googleapiclient's HttpError) are recognised from their status
+    code and raw response body; other exceptions from their message.
+
+    Args:
+        error: Exception raised while executing a batchUpdate
+
+    Raises:
+        Exception: If error is a revision conflict
+    """
+    status = getattr(getattr(error, "resp", None), "status", None)
+    content = getattr(error, "content", None)
+    if status is not None and isinstance(content, bytes):
+        is_conflict = int(status) in _PRECONDITION_STATUSES and _REVISION_CONFLICT_RE.search(content) is not None
+    else:
+        error_msg = str(error)
+        is_conflict = "requiredRevisionId" in error_msg or "document has been modified" in error_msg.lower()
+
+    if is_conflict:
+        raise Exception(f"Document was modified since last read. Use --force to bypass this check, or re-read the document. Error: {error}")
+
+
+def batch_update(
+    service,
+    document_id: str,
+    requests: List[Dict[str, Any]],
+    required_revision_id: Optional[str] = None,
+    operation_name: str = "Batch update"
+) -> Dict[str, Any]:
+    """
+    Send requests to the documents.batchUpdate API.
+
+    More than MAX_REQUESTS_PER_BATCH requests are sent as consecutive calls, in
+    order, each one required to apply on top of the revision the previous one
+    produced. Each call is atomic, but the sequence as a whole is not: if a
+    later call fails, the earlier ones stay applied.
+
+    Args:
+        service: Authenticated Google Docs API service
+        document_id: The ID of the document to edit
+        requests: Request dicts, in the order they must be applied
+        required_revision_id: Optional revision ID for safety - first call fails if document changed
+        operation_name: Name of the operation for error messages (e.g. "Insert operation")
+
+    Returns:
+        API response, with the replies of all calls merged in order (with no
+        requests, no call is made and the replies are empty)
+
+    Raises:
+        PartialUpdateError: If a call fails after earlier calls were applied
+        Exception: If the operation fails or revision check fails
+    """
+    if not requests:
+        return {"documentId": document_id, "replies": []}
+
+    response = None
+    replies = []
+    applied = 0  # Requests in the calls that have succeeded
+
+    try:
+        # One chunk at a time: later requests' indices are only valid once the
+        # earlier chunks have been applied
+        for chunk_start in range(0, len(requests), MAX_REQUESTS_PER_BATCH):
+            body = {"requests": requests[chunk_start:chunk_start + MAX_REQUESTS_PER_BATCH]}
+            if required_revision_id:
+                body["writeControl"] = {"requiredRevisionId": required_revision_id}
+
+            response = documents_resource(service).batchUpdate(
+                documentId=document_id,
+                body=body
+            ).execute()
+            replies.extend(response.get("replies", []))
+            applied += len(body["requests"])
+
+            # Chain the next chunk onto the revision this one produced
+            required_revision_id = (response.get("writeControl") or {}).get("requiredRevisionId")
+    except Exception as e:
+        if applied:
+            # The document has been partly edited, so neither a retry nor --force is safe
+            raise PartialUpdateError(
+                f"{operation_name} failed after {applied} of {len(requests)} requests were applied "
+                f"({applied // MAX_REQUESTS_PER_BATCH} of "
+                f"{-(-len(requests) // MAX_REQUESTS_PER_BATCH)} batchUpdate calls), "
+                f"leaving the document partly edited at revision {required_revision_id}. "
+                f"Re-read the document before making further edits. Error: {e}",
+                applied,
+                len(requests),
+                required_revision_id,
+            ) from e
+        _raise_for_revision_conflict(e)
+        raise Exception(f"{operation_name} failed: {e}")
+
+    response["replies"] = replies
+    return response
+
+
 def insert_text(
     service,
     document_id: str,
@@ -60,7 +259,8 @@ def insert_text(
     strikethrough: bool = False,
     code: bool = False,
     required_revision_id: Optional[str] = None,
-    dry_run: bool = False
+    dry_run: bool = False,
+    text_format: int = 0
 ) -> Dict[str, Any]:
     """
     Insert text at a specific index in the document.
@@ -79,6 +279,8 @@ def insert_text(
         code: If True, apply monospace font (Courier New) for code formatting
         required_revision_id: Optional revision ID for safety - operation fails if document changed
         dry_run: If True, return the request without executing it
+        text_format: Bitmask of BOLD, ITALIC, UNDERLINE, STRIKETHROUGH and CODE
+            (combined with the individual boolean flags)
 
     Returns:
         API response or request preview if dry_run=True
@@ -86,10 +288,24 @@ def insert_text(
     Raises:
         Exception: If the operation fails or revision check fails
     """
+    text_format |= (
+        (BOLD if bold else 0)
+        | (ITALIC if italic else 0)
+        | (UNDERLINE if underline else 0)
+        | (STRIKETHROUGH if strikethrough else 0)
+        | (CODE if code else 0)
+    )
+
     # Calculate the range of inserted text
     text_length = len(text.encode('utf-16-le')) // 2  # UTF-16 code units
     end_index = index + text_length
 
+    # Range covering the inserted text, shared by every formatting request below
+    inserted_range = {
+        "startIndex": index,
+        "endIndex": end_index,
+    }
+
     # Build requests list
     requests = []
 
@@ -106,10 +322,7 @@ def insert_text(
     if paragraph_style:
         style_request = {
             "updateParagraphStyle": {
-                "range": {
-                    "startIndex": index,
-                    "endIndex": end_index,
-                },
+                "range": inserted_range,
                 "paragraphStyle": {
                     "namedStyleType": paragraph_style
                 },
@@ -122,48 +335,25 @@ def insert_text(
     if bullet_preset:
         bullet_request = {
             "createParagraphBullets": {
-                "range": {
-                    "startIndex": index,
-                    "endIndex": end_index,
-                },
+                "range": inserted_range,
                 "bulletPreset": bullet_preset
             }
         }
         requests.append(bullet_request)
 
     # Fourth request: apply text formatting if any specified
-    if bold or italic or underline or strikethrough or code:
+    if text_format:
         text_style = {}
         fields = []
 
-        if bold:
-            text_style["bold"] = True
-            fields.append("bold")
-
-        if italic:
-            text_style["italic"] = True
-            fields.append("italic")
-
-        if underline:
-            text_style["underline"] = True
-            fields.append("underline")
-
-        if strikethrough:
-            text_style["strikethrough"] = True
-            fields.append("strikethrough")
-
-        if code:
-            text_style["weightedFontFamily"] = {
-                "fontFamily": "Courier New"
-            }
-            fields.append("weightedFontFamily")
+        for flag, style, field in _TEXT_FORMATS:
+            if text_format & flag:
+                text_style.update(style)
+                fields.append(field)
 
         text_style_request = {
             "updateTextStyle": {
-                "range": {
-                    "startIndex": index,
-                    "endIndex": end_index,
-                },
+                "range": inserted_range,
                 "textStyle": text_style,
                 "fields": ",".join(fields)
             }
@@ -178,21 +368,13 @@ def insert_text(
         }
 
     # Execute batch update
-    try:
-        body = {"requests": requests}
-        if required_revision_id:
-            body["writeControl"] = {"requiredRevisionId": required_revision_id}
-
-        response = service.documents().batchUpdate(
-            documentId=document_id,
-            body=body
-        ).execute()
-        return response
-    except Exception as e:
-        error_msg = str(e)
-        if "requiredRevisionId" in error_msg or "document has been modified" in error_msg.lower():
-            raise Exception(f"Document was modified since last read. Use --force to bypass this check, or re-read the document. Error: {e}")
-        raise Exception(f"Insert operation failed: {e}")
+    return batch_update(
+        service,
+        document_id,
+        requests,
+        required_revision_id=required_revision_id,
+        operation_name="Insert operation"
+    )
 
 
 def delete_text(
@@ -296,7 +478,8 @@ def execute_operations(
     Execute a batch of edit operations.
 
     Operations are automatically ordered by descending index to avoid
-    offset shifts during execution.
+    offset shifts during execution. Large batches are split as described in
+    batch_update.
 
     Args:
         service: Authenticated Google Docs API service
@@ -308,6 +491,7 @@ def execute_operations(
         API response from batchUpdate
 
     Raises:
+        PartialUpdateError: If a large batch fails after some of its calls were applied
         Exception: If the batch operation fails or revision check fails
     """
     if not operations:
@@ -315,45 +499,60 @@ def execute_operations(
 
     # Sort operations by descending index to avoid offset issues
     # For operations at the same index, inserts should come before deletes
-    sorted_ops = sorted(
-        operations,
-        key=lambda op: (-op.start_index, 0 if op.op_type == "insert" else 1)
-    )
+    # (the position keeps remaining ties in their original order, as a stable sort would)
+    sort_keys = [
+        (-op.start_index, 0 if op.op_type == "insert" else 1, position)
+        for position, op in enumerate(operations)
+    ]
+    sort_keys.sort()
 
     # Convert to API request format
-    requests = [op.to_request() for op in sorted_ops]
+    requests = [operations[position].to_request() for _, _, position in sort_keys]
 
     # Execute batch update
-    try:
-        body = {"requests": requests}
-        if required_revision_id:
-            body["writeControl"] = {"requiredRevisionId": required_revision_id}
-
-        response = service.documents().batchUpdate(
-            documentId=document_id,
-            body=body
-        ).execute()
-        return response
-    except Exception as e:
-        error_msg = str(e)
-        if "requiredRevisionId" in error_msg or "document has been modified" in error_msg.lower():
-            raise Exception(f"Document was modified since last read. Use --force to bypass this check, or re-read the document. Error: {e}")
-        raise Exception(f"Batch update failed: {e}")
+    return batch_update(service, document_id, requests, required_revision_id=required_revision_id)
+
+
+def _add_insert(op_dict: Dict[str, Any], edit_operations: List[EditOperation]) -> None:
+    edit_operations.append(EditOperation("insert", op_dict["startIndex"], text=op_dict["text"]))
+
+
+def _add_delete(op_dict: Dict[str, Any], edit_operations: List[EditOperation]) -> None:
+    edit_operations.append(EditOperation("delete", op_dict["startIndex"], op_dict["endIndex"]))
+
+
+def _add_replace(op_dict: Dict[str, Any], edit_operations: List[EditOperation]) -> None:
+    end_index = op_dict["endIndex"]
+    # Replace is insert + delete
+    edit_operations.append(EditOperation("insert", end_index, text=op_dict["text"]))
+    edit_operations.append(EditOperation("delete", op_dict["startIndex"], end_index))
+
+
+# Batch operation type -> function that appends its EditOperations
+_BATCH_OPERATION_BUILDERS = {
+    "insert": _add_insert,
+    "delete": _add_delete,
+    "replace": _add_replace,
+}
 
 
 def batch_edit(
     service,
     document_id: str,
-    operations: List[Dict[str, Any]],
+    operations: Iterable[Dict[str, Any]],
     dry_run: bool = False
 ) -> Dict[str, Any]:
     """
-    Execute multiple edit operations in a single batch.
+    Execute multiple edit operations as one batch update.
+
+    Up to MAX_REQUESTS_PER_BATCH requests are applied atomically. Larger
+    batches are split into consecutive calls, and a failure part-way leaves
+    the earlier calls applied (see batch_update).
 
     Args:
         service: Authenticated Google Docs API service
         document_id: The ID of the document to edit
-        operations: List of operation dicts with keys:
+        operations: Operation dicts (any iterable, consumed once) with keys:
             - type: "insert", "delete", or "replace"
             - startIndex: int
             - endIndex: int (for delete/replace)
@@ -374,21 +573,10 @@ def batch_edit(
 
     for op_dict in operations:
         op_type = op_dict["type"]
-        start_index = op_dict["startIndex"]
-
-        if op_type == "insert":
-            edit_operations.append(EditOperation("insert", start_index, text=op_dict["text"]))
-        elif op_type == "delete":
-            end_index = op_dict["endIndex"]
-            edit_operations.append(EditOperation("delete", start_index, end_index))
-        elif op_type == "replace":
-            end_index = op_dict["endIndex"]
-            text = op_dict["text"]
-            # Replace is insert + delete
-            edit_operations.append(EditOperation("insert", end_index, text=text))
-            edit_operations.append(EditOperation("delete", start_index, end_index))
-        else:
+        add_operations = _BATCH_OPERATION_BUILDERS.get(op_type)
+        if add_operations is None:
             raise ValueError(f"Unknown operation type: {op_type}")
+        add_operations(op_dict, edit_operations)
 
     if dry_run:
         return {
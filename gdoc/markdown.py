@@ -7,6 +7,63 @@ Converts markdown syntax to Google Docs API requests for formatting.
 import re
 from typing import List, Dict, Any, Tuple
 
+from gdoc.editor import PartialUpdateError, batch_update
+
+# Inline markup spans, tried in this order at each position: ***bold italic***,
+# **bold**, *italic*, `code`. A span ends at the first closing delimiter and
+# must not be empty (the lookaheads reject a closing delimiter right after the opening one).
+_INLINE_RE = re.compile(
+    r'\*\*\*(?!\*\*\*)(.+?)\*\*\*'
+    r'|\*\*(?!\*\*)(.+?)\*\*'
+    r'|\*(?!\*)(.+?)\*'
+    r'|`(?!`)(.+?)`',
+    re.DOTALL,
+)
+
+# Format type for each of _INLINE_RE's groups (by group number)
+_INLINE_FORMATS = (None, 'bold_italic', 'bold', 'italic', 'code')
+
+# Paragraph-level markdown prefix: heading (# to ###), bullet (- or *) or numbered item (1.)
+_LINE_RE = re.compile(r'(?P<heading>#{1,3}) |(?P<bullet>[-*]) |(?P<numbered>\d+)\.\s')
+
+# Non-digit characters a _LINE_RE match can start with
+_LINE_MARKUP_CHARS = frozenset('#-*')
+
+# Text styles for the inline formats, shared by every updateTextStyle request
+# (requests are only serialized, never modified)
+_BOLD_STYLE = {"bold": True}
+_ITALIC_STYLE = {"italic": True}
+_BOLD_ITALIC_STYLE = {"bold": True, "italic": True}
+_CODE_STYLE = {
+    "weightedFontFamily": {"fontFamily": "Courier New"},
+    "fontSize": {"magnitude": 10, "unit": "PT"}
+}
+
+# Inline format type -> (textStyle, fields) for its updateTextStyle request
+_INLINE_STYLES = {
+    'bold': (_BOLD_STYLE, "bold"),
+    'italic': (_ITALIC_STYLE, "italic"),
+    'bold_italic': (_BOLD_ITALIC_STYLE, "bold,italic"),
+    'code': (_CODE_STYLE, "weightedFontFamily,fontSize"),
+}
+
+
+def _utf16_len(text: str) -> int:
+    """
+    Get the length of text in UTF-16 code units, the unit Google Docs indices count in.
+
+    Args:
+        text: Text to measure
+
+    Returns:
+        Number of UTF-16 code units
+    """
+    # Only characters outside the Basic Multilingual Plane take two code units,
+    # so ASCII and other BMP-only text needs no encoding
+    if text.isascii() or max(text) <= "\uffff":
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
 
 def strip_inline_markdown(text: str) -> Tuple[str, List[Tuple[int, int, str]]]:
     """
@@ -16,64 +73,31 @@ def strip_inline_markdown(text: str) -> Tuple[str, List[Tuple[int, int, str]]]:
         text: Text with inline markdown (**, *, `)
 
     Returns:
-        Tuple of (cleaned_text, [(start_pos, end_pos, format_type), ...])
+        Tuple of (cleaned_text, [(start_pos, end_pos, format_type), ...]), with
+        positions in UTF-16 code units (the unit Google Docs indices count in)
     """
+    # Only astral characters (e.g. emoji) make UTF-16 length differ from len()
+    measure = len if text.isascii() or max(text) <= "\uffff" else _utf16_len
+
     formats = []
     cleaned = []
-    i = 0
-
-    while i < len(text):
-        # Check for bold+italic (***text***)
-        if i + 3 <= len(text) and text[i:i+3] == '***':
-            end = text.find('***', i + 3)
-            if end != -1 and end > i + 3:
-                content = text[i+3:end]
-                start_pos = len(''.join(cleaned))
-                cleaned.append(content)
-                end_pos = len(''.join(cleaned))
-                formats.append((start_pos, end_pos, 'bold_italic'))
-                i = end + 3
-                continue
-
-        # Check for bold (**text**)
-        if i + 2 <= len(text) and text[i:i+2] == '**':
-            end = text.find('**', i + 2)
-            if end != -1 and end > i + 2:
-                content = text[i+2:end]
-                start_pos = len(''.join(cleaned))
-                cleaned.append(content)
-                end_pos = len(''.join(cleaned))
-                formats.append((start_pos, end_pos, 'bold'))
-                i = end + 2
-                continue
-
-        # Check for italic (*text*)
-        if text[i] == '*':
-            end = text.find('*', i + 1)
-            if end != -1 and end > i + 1:
-                content = text[i+1:end]
-                start_pos = len(''.join(cleaned))
-                cleaned.append(content)
-                end_pos = len(''.join(cleaned))
-                formats.append((start_pos, end_pos, 'italic'))
-                i = end + 1
-                continue
-
-        # Check for code (`text`)
-        if text[i] == '`':
-            end = text.find('`', i + 1)
-            if end != -1 and end > i + 1:
-                content = text[i+1:end]
-                start_pos = len(''.join(cleaned))
-                cleaned.append(content)
-                end_pos = len(''.join(cleaned))
-                formats.append((start_pos, end_pos, 'code'))
-                i = end + 1
-                continue
-
-        # Regular character
-        cleaned.append(text[i])
-        i += 1
+    length = 0  # UTF-16 length of the cleaned text so far
+    last_end = 0
+
+    for match in _INLINE_RE.finditer(text):
+        # Plain text since the previous span
+        plain = text[last_end:match.start()]
+        cleaned.append(plain)
+        length += measure(plain)
+
+        content = match.group(match.lastindex)
+        content_length = measure(content)
+        cleaned.append(content)
+        formats.append((length, length + content_length, _INLINE_FORMATS[match.lastindex]))
+        length += content_length
+        last_end = match.end()
+
+    cleaned.append(text[last_end:])
 
     return ''.join(cleaned), formats
 
@@ -95,61 +119,87 @@ def parse_markdown_to_requests(text: str, start_index: int) -> Tuple[List[Dict[s
     # Process line by line to handle paragraph styles and inline formatting
     lines = text.split('\n')
 
-    processed_lines = []
-    line_styles = []  # Track what style each line needs
-    line_start_indices = []
-    all_inline_formats = []  # Track all inline formatting
-
-    for line in lines:
-        line_start_indices.append(current_index)
-
-        # Detect line type and strip paragraph-level markdown
-        if line.startswith('# '):
-            # Heading 1
-            line_content = line[2:]
-            line_styles.append(('heading', 'HEADING_1'))
-
-        elif line.startswith('## '):
-            # Heading 2
-            line_content = line[3:]
-            line_styles.append(('heading', 'HEADING_2'))
-
-        elif line.startswith('### '):
-            # Heading 3
-            line_content = line[4:]
-            line_styles.append(('heading', 'HEADING_3'))
-
-        elif line.startswith('- ') or line.startswith('* '):
-            # Bullet point
-            line_content = line[2:]
-            line_styles.append(('bullet', None))
-
-        elif re.match(r'^\d+\.\s', line):
-            # Numbered list
-            match = re.match(r'^\d+\.\s(.*)$', line)
-            line_content = match.group(1)
-            line_styles.append(('numbered', None))
-
+    # Without astral characters every character is one UTF-16 code unit, so a
+    # single scan of the whole text lets every line be measured with len()
+    measure = len if text.isascii() or max(text) <= "\uffff" else _utf16_len
+
+    # One processed line per input line, so the list is sized up front
+    processed_lines = [''] * len(lines)
+    # Consecutive lines with the same style share one range (one request per run
+    # rather than per line); consecutive list items likewise share one bullet range,
+    # so they form a single list and numbering continues across items
+    style_ranges = []  # [start, end, namedStyleType]
+    bullet_ranges = []  # [start, end]
+    numbered_ranges = []  # [start, end]
+    all_inline_formats = []  # Track all inline formatting, [start, end, format_type]
+    last_inline_format = {}  # format_type -> its most recent entry in all_inline_formats
+
+    for line_number, line in enumerate(lines):
+        # Explicitly set paragraphs and list items to NORMAL_TEXT to prevent style inheritance
+        named_style = "NORMAL_TEXT"
+        list_ranges = None
+
+        # Detect line type and strip paragraph-level markdown (only lines starting
+        # with a markup character or a digit can match, so plain paragraphs skip the regex)
+        first_char = line[:1]
+        if first_char in _LINE_MARKUP_CHARS or first_char.isdecimal():
+            match = _LINE_RE.match(line)
         else:
+            match = None
+        if match is None:
             # Regular paragraph
-            line_content = line if line else ''
-            line_styles.append(('paragraph', None))
+            line_content = line
+
+        else:
+            line_content = line[match.end():]
+            if match.lastgroup == 'heading':
+                # Heading 1-3, from the number of '#'
+                named_style = f"HEADING_{len(match.group('heading'))}"
+            elif match.lastgroup == 'bullet':
+                # Bullet point
+                list_ranges = bullet_ranges
+            else:
+                # Numbered list
+                list_ranges = numbered_ranges
 
         # Strip inline markdown from this line
         cleaned_line, inline_formats = strip_inline_markdown(line_content)
-        clean_line = cleaned_line + '\n'
 
         # Adjust inline format positions to document positions
         for start_pos, end_pos, format_type in inline_formats:
             doc_start = current_index + start_pos
             doc_end = current_index + end_pos
-            all_inline_formats.append((doc_start, doc_end, format_type))
 
-        processed_lines.append(clean_line)
-        current_index += len(clean_line.encode('utf-16-le')) // 2
+            # A span that starts where the last one of the same format ended extends it
+            previous = last_inline_format.get(format_type)
+            if previous is not None and previous[1] == doc_start:
+                previous[1] = doc_end
+            else:
+                previous = [doc_start, doc_end, format_type]
+                all_inline_formats.append(previous)
+                last_inline_format[format_type] = previous
+
+        processed_lines[line_number] = cleaned_line
+        # The +1 is the newline the join below adds after every line
+        line_end = current_index + measure(cleaned_line) + 1
+
+        # Lines are contiguous, so a style run continues whenever the style repeats
+        if style_ranges and style_ranges[-1][2] == named_style:
+            style_ranges[-1][1] = line_end
+        else:
+            style_ranges.append([current_index, line_end, named_style])
+
+        if list_ranges is not None:
+            if list_ranges and list_ranges[-1][1] == current_index:
+                list_ranges[-1][1] = line_end
+            else:
+                list_ranges.append([current_index, line_end])
+
+        current_index = line_end
 
-    # Join all processed lines to create the plain text to insert
-    full_text = ''.join(processed_lines)
+    # Join all processed lines to create the plain text to insert (every line,
+    # including the last, ends with a newline)
+    full_text = '\n'.join(processed_lines) + '\n'
 
     # Request 1: Insert the plain text
     requests.append({
@@ -160,73 +210,19 @@ def parse_markdown_to_requests(text: str, start_index: int) -> Tuple[List[Dict[s
     })
 
     # Request 2+: Apply paragraph styles
-    current_idx = start_index
-    bullet_ranges = []
-    numbered_ranges = []
-
-    for i, (line, (style_type, style_value)) in enumerate(zip(processed_lines, line_styles)):
-        line_length = len(line.encode('utf-16-le')) // 2
-        line_end = current_idx + line_length
-
-        if style_type == 'heading' and style_value:
-            requests.append({
-                "updateParagraphStyle": {
-                    "range": {
-                        "startIndex": current_idx,
-                        "endIndex": line_end
-                    },
-                    "paragraphStyle": {
-                        "namedStyleType": style_value
-                    },
-                    "fields": "namedStyleType"
-                }
-            })
-        elif style_type == 'paragraph':
-            # Explicitly set regular paragraphs to NORMAL_TEXT to prevent style inheritance
-            requests.append({
-                "updateParagraphStyle": {
-                    "range": {
-                        "startIndex": current_idx,
-                        "endIndex": line_end
-                    },
-                    "paragraphStyle": {
-                        "namedStyleType": "NORMAL_TEXT"
-                    },
-                    "fields": "namedStyleType"
-                }
-            })
-        elif style_type == 'bullet':
-            # Set bullets to NORMAL_TEXT to prevent style inheritance
-            requests.append({
-                "updateParagraphStyle": {
-                    "range": {
-                        "startIndex": current_idx,
-                        "endIndex": line_end
-                    },
-                    "paragraphStyle": {
-                        "namedStyleType": "NORMAL_TEXT"
-                    },
-                    "fields": "namedStyleType"
-                }
-            })
-            bullet_ranges.append((current_idx, line_end))
-        elif style_type == 'numbered':
-            # Set numbered lists to NORMAL_TEXT to prevent style inheritance
-            requests.append({
-                "updateParagraphStyle": {
-                    "range": {
-                        "startIndex": current_idx,
-                        "endIndex": line_end
-                    },
-                    "paragraphStyle": {
-                        "namedStyleType": "NORMAL_TEXT"
-                    },
-                    "fields": "namedStyleType"
-                }
-            })
-            numbered_ranges.append((current_idx, line_end))
-
-        current_idx = line_end
+    for start, end, named_style in style_ranges:
+        requests.append({
+            "updateParagraphStyle": {
+                "range": {
+                    "startIndex": start,
+                    "endIndex": end
+                },
+                "paragraphStyle": {
+                    "namedStyleType": named_style
+                },
+                "fields": "namedStyleType"
+            }
+        })
 
     # Request 3: Apply bullet formatting to all bullet ranges
     if bullet_ranges:
@@ -256,43 +252,17 @@ def parse_markdown_to_requests(text: str, start_index: int) -> Tuple[List[Dict[s
 
     # Request 5+: Apply inline formatting (bold, italic, code)
     for start_idx, end_idx, format_type in all_inline_formats:
-        if format_type == 'bold':
-            requests.append({
-                "updateTextStyle": {
-                    "range": {"startIndex": start_idx, "endIndex": end_idx},
-                    "textStyle": {"bold": True},
-                    "fields": "bold"
-                }
-            })
-        elif format_type == 'italic':
-            requests.append({
-                "updateTextStyle": {
-                    "range": {"startIndex": start_idx, "endIndex": end_idx},
-                    "textStyle": {"italic": True},
-                    "fields": "italic"
-                }
-            })
-        elif format_type == 'bold_italic':
-            requests.append({
-                "updateTextStyle": {
-                    "range": {"startIndex": start_idx, "endIndex": end_idx},
-                    "textStyle": {"bold": True, "italic": True},
-                    "fields": "bold,italic"
-                }
-            })
-        elif format_type == 'code':
-            requests.append({
-                "updateTextStyle": {
-                    "range": {"startIndex": start_idx, "endIndex": end_idx},
-                    "textStyle": {
-                        "weightedFontFamily": {"fontFamily": "Courier New"},
-                        "fontSize": {"magnitude": 10, "unit": "PT"}
-                    },
-                    "fields": "weightedFontFamily,fontSize"
-                }
-            })
-
-    total_length = len(full_text.encode('utf-16-le')) // 2
+        text_style, fields = _INLINE_STYLES[format_type]
+        requests.append({
+            "updateTextStyle": {
+                "range": {"startIndex": start_idx, "endIndex": end_idx},
+                "textStyle": text_style,
+                "fields": fields
+            }
+        })
+
+    # Every line's UTF-16 length was already added to the running index
+    total_length = current_index - start_index
     return requests, total_length
 
 
@@ -317,6 +287,10 @@ def insert_markdown(
 
     Returns:
         API response or request preview if dry_run=True
+
+    Raises:
+        PartialUpdateError: If the text was inserted but some of its formatting was not applied
+        Exception: If the operation fails or revision check fails
     """
     # Parse markdown and generate requests
     requests, total_length = parse_markdown_to_requests(markdown_text, index)
@@ -331,17 +305,22 @@ def insert_markdown(
 
     # Execute batch update
     try:
-        body = {"requests": requests}
-        if required_revision_id:
-            body["writeControl"] = {"requiredRevisionId": required_revision_id}
-
-        response = service.documents().batchUpdate(
-            documentId=document_id,
-            body=body
-        ).execute()
-        return response
-    except Exception as e:
-        error_msg = str(e)
-        if "requiredRevisionId" in error_msg or "document has been modified" in error_msg.lower():
-            raise Exception(f"Document was modified since last read. Use --force to bypass this check, or re-read the document. Error: {e}")
-        raise Exception(f"Insert markdown operation failed: {e}")
+        return batch_update(
+            service,
+            document_id,
+            requests,
+            required_revision_id=required_revision_id,
+            operation_name="Insert markdown operation"
+        )
+    except PartialUpdateError as e:
+        # The insertText request is first, so it is always among the applied requests
+        raise PartialUpdateError(
+            f"Insert markdown operation inserted the text at index {index}, but failed after "
+            f"{e.applied_requests - 1} of {e.total_requests - 1} formatting requests were applied, "
+            f"leaving the document at revision {e.revision_id}. Do not retry the insert: the text "
+            f"is already in the document and would be inserted twice. Re-read the document and "
+            f"fix the remaining formatting instead. Error: {e.__cause__}",
+            e.applied_requests,
+            e.total_requests,
+            e.revision_id,
+        ) from e.__cause__
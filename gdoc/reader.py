@@ -8,6 +8,25 @@ optimized for programmatic analysis and editing.
 import json
 from typing import Dict, List, Any, Optional
 
+from gdoc.editor import documents_resource
+
+# json.dumps options for indented and compact output
+_JSON_PRETTY = {"indent": 2}
+_JSON_COMPACT = {"separators": (",", ":")}
+
+# Map Google Docs style types to simpler names
+_STYLE_MAP = {
+    "NORMAL_TEXT": "paragraph",
+    "TITLE": "title",
+    "SUBTITLE": "subtitle",
+    "HEADING_1": "heading1",
+    "HEADING_2": "heading2",
+    "HEADING_3": "heading3",
+    "HEADING_4": "heading4",
+    "HEADING_5": "heading5",
+    "HEADING_6": "heading6",
+}
+
 
 def get_document(service, document_id: str) -> Dict[str, Any]:
     """
@@ -24,7 +43,7 @@ def get_document(service, document_id: str) -> Dict[str, Any]:
         Exception: If the document cannot be fetched
     """
     try:
-        document = service.documents().get(documentId=document_id).execute()
+        document = documents_resource(service).get(documentId=document_id).execute()
         return document
     except Exception as e:
         raise Exception(f"Failed to fetch document: {e}")
@@ -56,24 +75,7 @@ def get_paragraph_style(paragraph: Dict[str, Any]) -> str:
     Returns:
         Style name (e.g., "heading1", "heading2", "paragraph", "title")
     """
-    if "paragraphStyle" in paragraph:
-        style = paragraph["paragraphStyle"]
-        if "namedStyleType" in style:
-            style_type = style["namedStyleType"]
-            # Map Google Docs style types to simpler names
-            style_map = {
-                "NORMAL_TEXT": "paragraph",
-                "TITLE": "title",
-                "SUBTITLE": "subtitle",
-                "HEADING_1": "heading1",
-                "HEADING_2": "heading2",
-                "HEADING_3": "heading3",
-                "HEADING_4": "heading4",
-                "HEADING_5": "heading5",
-                "HEADING_6": "heading6",
-            }
-            return style_map.get(style_type, "paragraph")
-    return "paragraph"
+    return _STYLE_MAP.get(paragraph.get("paragraphStyle", {}).get("namedStyleType"), "paragraph")
 
 
 def parse_document_structure(document: Dict[str, Any]) -> Dict[str, Any]:
@@ -99,15 +101,19 @@ def parse_document_structure(document: Dict[str, Any]) -> Dict[str, Any]:
     full_text_parts = []
 
     for element in content_list:
+        start_index = element.get("startIndex")
+        end_index = element.get("endIndex")
+
         if "paragraph" in element:
             paragraph = element["paragraph"]
-            start_index = element.get("startIndex")
-            end_index = element.get("endIndex")
 
-            # Extract text from all elements in the paragraph
-            text = ""
-            for para_element in paragraph.get("elements", []):
-                text += extract_text_from_element(para_element)
+            # Extract text from all elements in the paragraph (one lookup per element)
+            text_parts = []
+            for para_element in paragraph.get("elements", ()):
+                text_run = para_element.get("textRun")
+                if text_run is not None:
+                    text_parts.append(text_run.get("content", ""))
+            text = "".join(text_parts)
 
             # Get paragraph style
             style = get_paragraph_style(paragraph)
@@ -124,8 +130,6 @@ def parse_document_structure(document: Dict[str, Any]) -> Dict[str, Any]:
 
         elif "table" in element:
             # Handle tables (basic support)
-            start_index = element.get("startIndex")
-            end_index = element.get("endIndex")
             structured_content.append({
                 "type": "table",
                 "text": "[TABLE]",
@@ -136,8 +140,6 @@ def parse_document_structure(document: Dict[str, Any]) -> Dict[str, Any]:
 
         elif "sectionBreak" in element:
             # Handle section breaks
-            start_index = element.get("startIndex")
-            end_index = element.get("endIndex")
             structured_content.append({
                 "type": "section_break",
                 "text": "",
@@ -149,7 +151,7 @@ def parse_document_structure(document: Dict[str, Any]) -> Dict[str, Any]:
     full_text = "".join(full_text_parts)
 
     # Calculate total document length
-    total_length = body.get("content", [{}])[-1].get("endIndex", 0) if body.get("content") else 0
+    total_length = content_list[-1].get("endIndex", 0) if content_list else 0
 
     return {
         "documentId": doc_id,
@@ -161,7 +163,30 @@ def parse_document_structure(document: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def read_document(service, document_id: str, format: str = "json") -> str:
+def format_document(parsed: Dict[str, Any], format: str = "json", pretty: bool = True) -> str:
+    """
+    Format a parsed document for output.
+
+    Args:
+        parsed: Structured document from parse_document_structure
+        format: Output format ("json" or "text")
+        pretty: If True, indent JSON output; otherwise use compact separators
+
+    Returns:
+        Formatted document content as a string
+    """
+    if format == "text":
+        return parsed["fullText"]
+    else:
+        return json.dumps(parsed, **(_JSON_PRETTY if pretty else _JSON_COMPACT))
+
+
+def read_document(
+    service,
+    document_id: str,
+    format: str = "json",
+    pretty: bool = True
+) -> str:
     """
     Read and format a Google Doc.
 
@@ -169,17 +194,14 @@ def read_document(service, document_id: str, format: str = "json") -> str:
         service: Authenticated Google Docs API service
         document_id: The ID of the document to read
         format: Output format ("json" or "text")
+        pretty: If True, indent JSON output; otherwise use compact separators
 
     Returns:
         Formatted document content as a string
     """
     document = get_document(service, document_id)
     parsed = parse_document_structure(document)
-
-    if format == "text":
-        return parsed["fullText"]
-    else:
-        return json.dumps(parsed, indent=2)
+    return format_document(parsed, format=format, pretty=pretty)
 
 
 def find_section(service, document_id: str, heading_text: str) -> Optional[Dict[str, Any]]:
@@ -192,21 +214,26 @@ def find_section(service, document_id: str, heading_text: str) -> Optional[Dict[
         heading_text: The heading text to search for
 
     Returns:
-        Section info with startIndex and endIndex, or None if not found
+        Section info with startIndex and endIndex and the document's revisionId,
+        or None if not found
     """
     document = get_document(service, document_id)
     parsed = parse_document_structure(document)
+    content = parsed["content"]
+    needle = heading_text.lower()
 
-    for i, item in enumerate(parsed["content"]):
-        if item["type"].startswith("heading") and heading_text.lower() in item["text"].lower():
-            # Find the end of this section (next heading or end of doc)
-            section_start = item["endIndex"]
-            section_end = parsed["totalLength"]
+    # Positions of the headings in content, so only headings are matched against
+    heading_positions = [i for i, item in enumerate(content) if item["type"].startswith("heading")]
 
-            for next_item in parsed["content"][i + 1:]:
-                if next_item["type"].startswith("heading"):
-                    section_end = next_item["startIndex"]
-                    break
+    for k, i in enumerate(heading_positions):
+        item = content[i]
+        if needle in item["text"].lower():
+            # The section ends at the next heading, or at the end of the doc
+            section_start = item["endIndex"]
+            if k + 1 < len(heading_positions):
+                section_end = content[heading_positions[k + 1]]["startIndex"]
+            else:
+                section_end = parsed["totalLength"]
 
             return {
                 "heading": item["text"].strip(),
@@ -214,6 +241,7 @@ def find_section(service, document_id: str, heading_text: str) -> Optional[Dict[
                 "headingEndIndex": item["endIndex"],
                 "contentStartIndex": section_start,
                 "contentEndIndex": section_end,
+                "revisionId": parsed["revisionId"],
             }
 
     return None
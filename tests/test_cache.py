@@ -0,0 +1,75 @@
+"""Tests for the local revision cache."""
+
+import json
+import time
+
+from gdoc.cache import REVISION_TTL_SECONDS, REVISIONS_FILE, get_cached_revision, save_revision
+
+
+def test_missing_cache_returns_none(tmp_path):
+    assert get_cached_revision("doc", "me", cache_dir=tmp_path) is None
+
+
+def test_save_then_load(tmp_path):
+    save_revision("doc", "rev1", "me", cache_dir=tmp_path)
+    save_revision("other", "rev9", "me", cache_dir=tmp_path)
+
+    assert get_cached_revision("doc", "me", cache_dir=tmp_path) == "rev1"
+    assert get_cached_revision("other", "me", cache_dir=tmp_path) == "rev9"
+
+
+def test_save_overwrites_previous_revision(tmp_path):
+    save_revision("doc", "rev1", "me", cache_dir=tmp_path)
+    save_revision("doc", "rev2", "me", cache_dir=tmp_path)
+
+    assert get_cached_revision("doc", "me", cache_dir=tmp_path) == "rev2"
+
+
+def test_empty_revision_is_not_saved(tmp_path):
+    save_revision("doc", None, "me", cache_dir=tmp_path)
+
+    assert not (tmp_path / REVISIONS_FILE).exists()
+
+
+def test_creates_missing_cache_dir(tmp_path):
+    cache_dir = tmp_path / "nested" / "cache"
+    save_revision("doc", "rev1", "me", cache_dir=cache_dir)
+
+    assert get_cached_revision("doc", "me", cache_dir=cache_dir) == "rev1"
+
+
+def test_corrupt_file_is_treated_as_empty(tmp_path):
+    (tmp_path / REVISIONS_FILE).write_text("{not json")
+
+    assert get_cached_revision("doc", "me", cache_dir=tmp_path) is None
+
+    save_revision("doc", "rev1", "me", cache_dir=tmp_path)
+    assert get_cached_revision("doc", "me", cache_dir=tmp_path) == "rev1"
+
+
+def test_non_object_file_is_treated_as_empty(tmp_path):
+    (tmp_path / REVISIONS_FILE).write_text('["doc", "rev1"]')
+
+    assert get_cached_revision("doc", "me", cache_dir=tmp_path) is None
+
+
+def test_stale_entry_is_ignored(tmp_path, monkeypatch):
+    save_revision("doc", "rev1", "me", cache_dir=tmp_path)
+
+    later = time.time() + REVISION_TTL_SECONDS + 1
+    monkeypatch.setattr(time, "time", lambda: later)
+
+    assert get_cached_revision("doc", "me", cache_dir=tmp_path) is None
+
+
+def test_entry_from_other_principal_is_ignored(tmp_path):
+    save_revision("doc", "rev1", "oauth:me", cache_dir=tmp_path)
+
+    assert get_cached_revision("doc", "service_account:key", cache_dir=tmp_path) is None
+
+
+def test_entry_without_timestamp_is_ignored(tmp_path):
+    # Entries written before revisions expired were bare revision ID strings
+    (tmp_path / REVISIONS_FILE).write_text(json.dumps({"doc": "rev1"}))
+
+    assert get_cached_revision("doc", None, cache_dir=tmp_path) is None
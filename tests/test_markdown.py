@@ -0,0 +1,92 @@
+"""Tests for the markdown to Google Docs request converter."""
+
+from gdoc.markdown import parse_markdown_to_requests, strip_inline_markdown
+
+
+def _utf16_len(text):
+    return len(text.encode("utf-16-le")) // 2
+
+
+def _requests_of_type(requests, request_type):
+    return [request[request_type] for request in requests if request_type in request]
+
+
+def test_strip_inline_formats():
+    cleaned, formats = strip_inline_markdown("***bi*** **b** *i* `c`")
+
+    assert cleaned == "bi b i c"
+    assert formats == [
+        (0, 2, "bold_italic"),
+        (3, 4, "bold"),
+        (5, 6, "italic"),
+        (7, 8, "code"),
+    ]
+
+
+def test_strip_plain_text_is_unchanged():
+    assert strip_inline_markdown("no markup here") == ("no markup here", [])
+
+
+def test_emoji_before_bold_span_uses_utf16_offsets():
+    cleaned, formats = strip_inline_markdown("👋 **hi**")
+
+    assert cleaned == "👋 hi"
+    # The emoji is two UTF-16 code units, so the span starts at 3, not 2
+    start = _utf16_len("👋 ")
+    assert formats == [(start, start + 2, "bold")]
+
+
+def test_empty_spans_are_left_as_text():
+    for text in ("****", "a****b", "**", "``"):
+        assert strip_inline_markdown(text) == (text, [])
+
+
+def test_parse_offsets_after_emoji():
+    requests, total_length = parse_markdown_to_requests("😀 **bold**\n", 1)
+
+    inserted = _requests_of_type(requests, "insertText")[0]["text"]
+    assert inserted == "😀 bold\n\n"
+    assert total_length == _utf16_len(inserted)
+
+    (text_style,) = _requests_of_type(requests, "updateTextStyle")
+    start = 1 + _utf16_len("😀 ")
+    assert text_style["range"] == {"startIndex": start, "endIndex": start + 4}
+    assert text_style["textStyle"] == {"bold": True}
+
+
+def test_consecutive_bullets_share_one_range():
+    requests, _ = parse_markdown_to_requests("- a\n- b\n* c\ntext\n- d", 1)
+
+    bullets = _requests_of_type(requests, "createParagraphBullets")
+    assert [bullet["range"] for bullet in bullets] == [
+        {"startIndex": 1, "endIndex": 7},
+        {"startIndex": 12, "endIndex": 14},
+    ]
+    assert {bullet["bulletPreset"] for bullet in bullets} == {"BULLET_DISC_CIRCLE_SQUARE"}
+
+
+def test_numbered_items_share_one_range():
+    requests, _ = parse_markdown_to_requests("1. one\n2. two", 1)
+
+    (numbered,) = _requests_of_type(requests, "createParagraphBullets")
+    assert numbered["range"] == {"startIndex": 1, "endIndex": 9}
+    assert numbered["bulletPreset"] == "NUMBERED_DECIMAL_ALPHA_ROMAN"
+
+
+def test_headings_and_paragraph_style_runs():
+    requests, _ = parse_markdown_to_requests("## Head\none\ntwo", 1)
+
+    styles = _requests_of_type(requests, "updateParagraphStyle")
+    assert [(s["range"], s["paragraphStyle"]["namedStyleType"]) for s in styles] == [
+        ({"startIndex": 1, "endIndex": 6}, "HEADING_2"),
+        ({"startIndex": 6, "endIndex": 14}, "NORMAL_TEXT"),
+    ]
+
+
+def test_four_hashes_are_not_a_heading():
+    requests, total_length = parse_markdown_to_requests("#### four", 1)
+
+    assert _requests_of_type(requests, "insertText")[0]["text"] == "#### four\n"
+    (style,) = _requests_of_type(requests, "updateParagraphStyle")
+    assert style["paragraphStyle"]["namedStyleType"] == "NORMAL_TEXT"
+    assert total_length == 10